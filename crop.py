@@ -1,23 +1,26 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
 from PIL import Image
 
-def crop_transparent_png(input_path):
+def _crop_transparent(img):
     """
-    1st Pass:
-    Crops a transparent PNG so that only the non-transparent pixels remain.
-    Returns an Image object (RGBA).
+    Crops an opened image so that only the non-transparent pixels remain.
+    Returns a new Image object (RGBA).
     """
-    img = Image.open(input_path)
-
-    # Ensure image is in RGBA mode (has an alpha channel)
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
-
-    # Extract the alpha channel
-    alpha = img.getchannel("A")
-
-    # Get the bounding box of non-transparent (non-zero) pixels in the alpha channel
-    bbox = alpha.getbbox()
+    # Ensure image is in RGBA mode (has an alpha channel). convert() returns a
+    # loaded copy, so the caller can close the file handle right away; for
+    # inputs that are already RGBA this costs one extra full-image copy.
+    img = img.convert("RGBA")
+
+    # Bounding box of non-transparent (non-zero) pixels, computed straight from
+    # the alpha band. Pillow < 10.0 lacks alpha_only, so split the channel there.
+    try:
+        bbox = img.getbbox(alpha_only=True)
+    except TypeError:
+        bbox = img.getchannel("A").getbbox()
 
     if bbox:
         # Crop the image to that bounding box
@@ -26,6 +29,16 @@ def crop_transparent_png(input_path):
     return img
 
 
+def crop_transparent_png(input_path):
+    """
+    1st Pass:
+    Crops a transparent PNG so that only the non-transparent pixels remain.
+    Returns an Image object (RGBA).
+    """
+    with Image.open(input_path) as src:
+        return _crop_transparent(src)
+
+
 def enforce_10_to_1_aspect(img):
     """
     2nd Pass:
@@ -41,26 +54,37 @@ def enforce_10_to_1_aspect(img):
     width, height = img.size
     target_width = int(9.8 * height)  # Because aspect ratio is 10:1
 
-    # Create a new image in "RGB" with a white background
-    #   for the final output (since we want white padding).
-    if width == target_width:
-        # Already 10:1, just flatten to white background
-        final_img = Image.new("RGB", (width, height), (255, 255, 255))
-        final_img.paste(img, (0, 0), mask=img)
-        return final_img
-    elif width < target_width:
-        # Need to add white padding on the right
-        final_img = Image.new("RGB", (target_width, height), (255, 255, 255))
-        final_img.paste(img, (0, 0), mask=img)
-        return final_img
-    else:
-        # width > target_width, crop from the right to enforce 10:1
-        cropped_img = img.crop((0, 0, target_width, height))
-        # Flatten to white background
+    # Crop from the right if wider than 10:1, so one code path handles all widths
+    if width > target_width:
+        img = img.crop((0, 0, target_width, height))
+
+    # Fully opaque images need no blending: a plain paste is a straight copy,
+    # and if there is nothing to pad the image itself is the result
+    if np.asarray(img.getchannel("A")).min() == 255:
+        if img.width == target_width:
+            return img.convert("RGB")
         final_img = Image.new("RGB", (target_width, height), (255, 255, 255))
-        final_img.paste(cropped_img, (0, 0), mask=cropped_img)
+        final_img.paste(img.convert("RGB"), (0, 0))
         return final_img
 
+    # Composite onto a white canvas in a single fused pass, padding on the right
+    final_img = Image.new("RGBA", (target_width, height), (255, 255, 255, 255))
+    final_img.alpha_composite(img, (0, 0))
+    return final_img.convert("RGB")
+
+
+def _already_final(src, input_path, output_path):
+    """
+    True if the opened image src is being processed in place and is already
+    an opaque 10:1 RGB image, i.e. both passes would leave its pixels unchanged.
+    Only looks at header information, so no pixel data is decoded.
+    """
+    if os.path.abspath(input_path) != os.path.abspath(output_path):
+        return False
+    width, height = src.size
+    return (src.mode == "RGB" and "transparency" not in src.info
+            and width == int(9.8 * height))
+
 
 def process_image(input_path, output_path):
     """
@@ -68,40 +92,121 @@ def process_image(input_path, output_path):
       1) Crop transparent borders
       2) Enforce 10:1 aspect ratio with white padding/cropping
     Then saves to output_path.
+    Returns output_path, or None if the image was already final and the
+    (expensive) re-encode was skipped.
     """
-    # 1) Crop transparent regions
-    cropped_img = crop_transparent_png(input_path)
+    with Image.open(input_path) as src:
+        if _already_final(src, input_path, output_path):
+            return None
+
+        # 1) Crop transparent regions
+        cropped_img = _crop_transparent(src)
 
     # 2) Enforce 10:1 aspect ratio
     final_img = enforce_10_to_1_aspect(cropped_img)
 
-    # Save result
-    final_img.save(output_path)
-    print(f"Saved final 10:1 image to: {output_path}")
+    # Save result. zlib deflate dominates save time; the output is mostly flat
+    # white padding, so a low compression level costs little in file size.
+    # optimize=True would re-run deflate at level 9, so keep it off.
+    final_img.save(output_path, format="PNG", compress_level=1, optimize=False)
+    return output_path
 
 
-def process_directory(directory_path, overwrite=True):
+def process_image_fast(input_path, output_path):
+    """
+    Same result as process_image, but both passes are fused into one NumPy
+    pipeline: decode once, crop to the alpha bounding box, enforce 10:1 and
+    flatten onto white, then encode once. Saves to output_path.
+    Returns output_path, or None if the re-encode was skipped.
+    """
+    with Image.open(input_path) as src:
+        if _already_final(src, input_path, output_path):
+            return None
+        arr = np.asarray(src.convert("RGBA"))
+
+    # 1) Crop transparent regions (a view, no copy)
+    alpha = arr[..., 3]
+    rows = np.any(alpha, axis=1)
+    cols = np.any(alpha, axis=0)
+    if rows.any():
+        top = int(np.argmax(rows))
+        bottom = len(rows) - int(np.argmax(rows[::-1]))
+        left = int(np.argmax(cols))
+        right = len(cols) - int(np.argmax(cols[::-1]))
+        arr = arr[top:bottom, left:right]
+
+    # 2) Enforce 10:1 aspect ratio, cropping from the right if too wide
+    height = arr.shape[0]
+    target_width = int(9.8 * height)  # Because aspect ratio is 10:1
+    arr = arr[:, :target_width]
+    width = arr.shape[1]
+
+    # White canvas; only the visible region gets blended, the rest is padding
+    out = np.full((height, target_width, 3), 255, np.uint8)
+    a = arr[..., 3:4]
+    if a.min() == 255:
+        out[:, :width] = arr[..., :3]
+    else:
+        rgb = arr[..., :3].astype(np.uint16)
+        a = a.astype(np.uint16)
+        out[:, :width] = (rgb * a + 255 * (255 - a) + 127) // 255
+
+    Image.fromarray(out).save(output_path, format="PNG", compress_level=1, optimize=False)
+    return output_path
+
+
+def _process_pair(paths, fast=True):
+    """
+    Worker for process_directory: unpacks an (input, output) pair and
+    returns (output_path, saved).
+    Must live at module level so it can be pickled by ProcessPoolExecutor.
+    """
+    input_path, output_path = paths
+    if fast:
+        result = process_image_fast(input_path, output_path)
+    else:
+        result = process_image(input_path, output_path)
+    return output_path, result is not None
+
+
+def process_directory(directory_path, overwrite=True, fast=True):
     """
     Processes all PNG files in the given directory:
       - Crops transparent areas
       - Enforces 10:1 aspect ratio
     Overwrites the original files if overwrite=True,
     otherwise saves with 'final_' prefix.
+    Uses the fused process_image_fast unless fast=False.
+    Images are independent of each other, so they are spread across all cores.
     """
     directory_path = os.path.abspath(directory_path)
-    
-    for filename in os.listdir(directory_path):
-        if filename.lower().endswith(".png"):
-            input_file = os.path.join(directory_path, filename)
+    pairs = []
+
+    # scandir gives us name, path and a cached is_file() without extra stat calls
+    with os.scandir(directory_path) as it:
+        for entry in it:
+            if not (entry.is_file() and entry.name.lower().endswith(".png")):
+                continue
+
+            input_file = entry.path
 
             if overwrite:
                 output_file = input_file
             else:
-                name_part, ext = os.path.splitext(filename)
-                new_name = f"final_{name_part}{ext}"
-                output_file = os.path.join(directory_path, new_name)
+                output_file = os.path.join(directory_path, "final_" + entry.name)
 
-            process_image(input_file, output_file)
+            pairs.append((input_file, output_file))
+
+    # Print from the parent process so output lines don't interleave
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for output_file, saved in ex.map(partial(_process_pair, fast=fast), pairs, chunksize=4):
+            if saved:
+                print(f"Saved final 10:1 image to: {output_file}")
+            else:
+                skipped += 1
+    if skipped:
+        print(f"Skipped {skipped} image(s) already at 10:1")
 
 
 if __name__ == "__main__":
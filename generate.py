@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
+import argparse
+import contextlib
 import csv
+import functools
 import re
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     import yaml
@@ -10,33 +15,49 @@ except ImportError:
     print("Please install PyYAML (e.g., pip install pyyaml).")
     raise SystemExit
 
-class IndentDumper(yaml.Dumper):
+# Only the pure-Python emitter honours increase_indent; libyaml's CSafeDumper
+# always writes indentless block sequences, which devicetype-library rejects.
+class IndentDumper(yaml.SafeDumper):
     def increase_indent(self, flow=False, indentless=False):
         return super(IndentDumper, self).increase_indent(flow, False)
 
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+# Strings that are safe to emit as plain (unquoted) YAML scalars
+_PLAIN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9 ./_+()'-]*\Z")
+_RESOLVER = yaml.resolver.Resolver()
+
 def slugify(s):
     """
     Convert a string to a slug safe for filenames and YAML 'slug' fields:
       - Lowercase
-      - Replace non-alphanumeric characters with '-'
-      - Collapse multiple dashes
+      - Replace runs of non-alphanumeric characters with a single '-'
       - Strip leading/trailing dashes
     """
-    s = s.lower()
-    s = re.sub(r'[^a-z0-9]+', '-', s)
-    s = re.sub(r'-+', '-', s)
-    return s.strip('-')
+    return _SLUG_RE.sub('-', s.lower()).strip('-')
 
-def create_interfaces(row):
+def create_interfaces(row, idx):
     """
     Build a list of interface definitions from the counts in the CSV row,
     using different naming conventions depending on whether 'Stacking' is true or false.
+    `idx` maps CSV column names to their position in `row`.
     """
 
     # Determine if stacking is enabled
-    stacking_str = row.get('Stacking', '').strip().lower()
+    stacking_str = (row[idx['Stacking']] if 'Stacking' in idx else '').strip().lower()
     is_stacking = (stacking_str == 'true')
 
+    # Parse all port counts once; empty cells count as zero
+    counts = {k: int(row[idx[k]] or 0) for k in (
+        'GigabitEthernet Copper',
+        'GigabitEthernet SFP',
+        'GigabitEthernet Combo',
+        'TwoGigabitEthernet',
+        'TenGigabitEthernet Copper',
+        'TenGigabitEthernet SFP+',
+        'TenGigabitEthernet Combo',
+    )}
+
     # If stacking, use e.g. "GigabitEthernet1/0/#"; if not, just "GigabitEthernet#".
     if is_stacking:
         base_name_1g = "GigabitEthernet1/0/"
@@ -50,109 +71,95 @@ def create_interfaces(row):
     int_index_10g = 1  # For 10G ports
 
     # A simple PoE detection: if the Model has 'P-' or 'FP-' in its name, assume PoE.
-    model_name = row['Model'].upper()
+    model_name = row[idx['Model']].upper()
     is_poe = ('P-' in model_name or 'FP-' in model_name)
 
     # 1) GigabitEthernet Copper
-    num_gi_copper = int(row['GigabitEthernet Copper'])
-    for _ in range(num_gi_copper):
-        iface = {
-            'name': f"{base_name_1g}{int_index_1g}",
-            'type': '1000base-t',
-            'enabled': True
-        }
-        if is_poe:
-            iface['poe_mode'] = 'pse'
-            iface['poe_type'] = 'type2-ieee802.3at'
-        interfaces.append(iface)
-        int_index_1g += 1
+    num_gi_copper = counts['GigabitEthernet Copper']
+    poe_fields = {'poe_mode': 'pse', 'poe_type': 'type2-ieee802.3at'} if is_poe else {}
+    interfaces.extend({
+        'name': f"{base_name_1g}{i}",
+        'type': '1000base-t',
+        'enabled': True,
+        **poe_fields
+    } for i in range(int_index_1g, int_index_1g + num_gi_copper))
+    int_index_1g += num_gi_copper
 
     #
     # 2) GigabitEthernet SFP (dedicated 1G fiber ports)
     #
-    num_gi_sfp = int(row['GigabitEthernet SFP'])
-    for _ in range(num_gi_sfp):
-        iface = {
-            'name': f"{base_name_1g}{int_index_1g}",
-            'type': '1000base-x-sfp',
-            'enabled': True
-        }
-        interfaces.append(iface)
-        int_index_1g += 1
+    num_gi_sfp = counts['GigabitEthernet SFP']
+    interfaces.extend({
+        'name': f"{base_name_1g}{i}",
+        'type': '1000base-x-sfp',
+        'enabled': True
+    } for i in range(int_index_1g, int_index_1g + num_gi_sfp))
+    int_index_1g += num_gi_sfp
 
     #
     # 3) GigabitEthernet Combo (RJ-45/SFP 1G combo ports)
     #
-    num_gi_combo = int(row['GigabitEthernet Combo'])
-    for _ in range(num_gi_combo):
-        iface = {
-            'name': f"{base_name_1g}{int_index_1g}",
-            # Custom type to indicate 1G copper/SFP combo in one port:
-            'type': '1000base-x-sfp',
-            'description': 'SFP/RJ45 Combo',
-            'enabled': True
-        }
-        interfaces.append(iface)
-        int_index_1g += 1
+    num_gi_combo = counts['GigabitEthernet Combo']
+    interfaces.extend({
+        'name': f"{base_name_1g}{i}",
+        # Custom type to indicate 1G copper/SFP combo in one port:
+        'type': '1000base-x-sfp',
+        'description': 'SFP/RJ45 Combo',
+        'enabled': True
+    } for i in range(int_index_1g, int_index_1g + num_gi_combo))
+    int_index_1g += num_gi_combo
 
     #
     # 4) TwoGigabitEthernet (2.5G, etc.) - multi-gig
     #
-    num_two_gi = int(row['TwoGigabitEthernet'])
-    for _ in range(num_two_gi):
-        # We'll name them as part of the same 1G numbering, but with type 2.5gbase-t
-        iface = {
-            'name': f"{base_name_1g}{int_index_1g}",
-            'type': '2.5gbase-t',
-            'enabled': True
-        }
-        interfaces.append(iface)
-        int_index_1g += 1
+    num_two_gi = counts['TwoGigabitEthernet']
+    # We'll name them as part of the same 1G numbering, but with type 2.5gbase-t
+    interfaces.extend({
+        'name': f"{base_name_1g}{i}",
+        'type': '2.5gbase-t',
+        'enabled': True
+    } for i in range(int_index_1g, int_index_1g + num_two_gi))
+    int_index_1g += num_two_gi
 
     #
     # 5) TenGigabitEthernet Copper
     #
-    num_ten_gi_copper = int(row['TenGigabitEthernet Copper'])
-    for _ in range(num_ten_gi_copper):
-        iface = {
-            'name': f"{base_name_10g}{int_index_10g}",
-            'type': '10gbase-t',
-            'enabled': True
-        }
-        interfaces.append(iface)
-        int_index_10g += 1
+    num_ten_gi_copper = counts['TenGigabitEthernet Copper']
+    interfaces.extend({
+        'name': f"{base_name_10g}{i}",
+        'type': '10gbase-t',
+        'enabled': True
+    } for i in range(int_index_10g, int_index_10g + num_ten_gi_copper))
+    int_index_10g += num_ten_gi_copper
 
     #
     # 6) TenGigabitEthernet SFP+
     #
-    num_ten_gi_sfp = int(row['TenGigabitEthernet SFP+'])
-    for _ in range(num_ten_gi_sfp):
-        iface = {
-            'name': f"{base_name_10g}{int_index_10g}",
-            'type': '10gbase-x-sfpp',
-            'enabled': True
-        }
-        interfaces.append(iface)
-        int_index_10g += 1
+    num_ten_gi_sfp = counts['TenGigabitEthernet SFP+']
+    interfaces.extend({
+        'name': f"{base_name_10g}{i}",
+        'type': '10gbase-x-sfpp',
+        'enabled': True
+    } for i in range(int_index_10g, int_index_10g + num_ten_gi_sfp))
+    int_index_10g += num_ten_gi_sfp
 
     #
     # 7) TenGigabitEthernet Combo (10G copper/SFP+ combo)
     #
-    num_ten_gi_combo = int(row['TenGigabitEthernet Combo'])
-    for _ in range(num_ten_gi_combo):
-        iface = {
-            'name': f"{base_name_10g}{int_index_10g}",
-            'type': '10gbase-x-sfpp',
-            'description': 'SFP+/RJ45 Combo',            
-            'enabled': True
-        }
-        interfaces.append(iface)
-        int_index_10g += 1
+    num_ten_gi_combo = counts['TenGigabitEthernet Combo']
+    interfaces.extend({
+        'name': f"{base_name_10g}{i}",
+        'type': '10gbase-x-sfpp',
+        'description': 'SFP+/RJ45 Combo',
+        'enabled': True
+    } for i in range(int_index_10g, int_index_10g + num_ten_gi_combo))
+    int_index_10g += num_ten_gi_combo
 
     #
     # 8) OOB interface (if any)
     #
-    if row['OOB'] and row['OOB'].isdigit() and int(row['OOB']) > 0:
+    oob = row[idx['OOB']]
+    if oob and oob.isdigit() and int(oob) > 0:
         iface = {
             'name': 'OOB',
             'type': '1000base-t',
@@ -173,25 +180,133 @@ def create_interfaces(row):
 
     return interfaces
 
-def create_console_ports(row):
+def create_console_ports(row, idx):
     """
     Build a list of console port definitions from con0, con1, con2 columns if they are non-empty.
+    `idx` maps CSV column names to their position in `row`.
+    """
+    # Only strip cells that actually hold something; blank cells are skipped outright
+    return [
+        {'name': c, 'type': v.strip()}
+        for c in ('con0', 'con1', 'con2')
+        if c in idx and (v := row[idx[c]]) and not v.isspace()
+    ]
+
+def yaml_scalar(value):
+    """
+    Format a single scalar the way IndentDumper would:
+    booleans as true/false, floats following SafeRepresenter.represent_float,
+    ints via repr, and strings plain unless they contain indicator characters
+    or would resolve to a non-string type, in which case they are quoted.
+    Strings with non-printable or non-ASCII characters are handed to yaml.dump
+    so they get the escaping they need.
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        if value != value:
+            return '.nan'
+        if value == float('inf'):
+            return '.inf'
+        if value == -float('inf'):
+            return '-.inf'
+        # YAML 1.1 only reads exponent floats that have a '.', e.g. 1.0e-07
+        text = repr(value).lower()
+        if '.' not in text and 'e' in text:
+            text = text.replace('e', '.0e', 1)
+        return text
+    if isinstance(value, int):
+        return repr(value)
+    if (_PLAIN_RE.match(value) and not value.endswith(' ')
+            and _RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) == 'tag:yaml.org,2002:str'):
+        return value
+    if value.isascii() and value.isprintable() and '\\' not in value:
+        return "'" + value.replace("'", "''") + "'"
+    # Double-quote anything with a line break so it stays on one escaped line
+    style = '"' if '\n' in value or '\r' in value else None
+    text = yaml.dump(value, Dumper=IndentDumper, allow_unicode=True,
+                     default_style=style, width=float('inf'))
+    return text.removesuffix('\n...\n').rstrip('\n')
+
+def emit_device_yaml(device_dict):
+    """
+    Emit the device dictionary as YAML text without going through yaml.dump.
+    The device schema is fixed: top-level keys map either to scalars or to lists
+    of flat dicts of scalars, which is all this needs to handle. The result
+    loads back to the same data as yaml.dump with IndentDumper, and is
+    byte-identical for the values in models.csv (use --safe to compare).
+    """
+    out = []
+    for key, value in device_dict.items():
+        if not isinstance(value, list):
+            out.append(f"{key}: {yaml_scalar(value)}\n")
+        elif not value:
+            out.append(f"{key}: []\n")
+        else:
+            out.append(f"{key}:\n")
+            for item in value:
+                prefix = "  - "
+                for k, v in item.items():
+                    out.append(f"{prefix}{k}: {yaml_scalar(v)}\n")
+                    prefix = "    "
+    return "".join(out)
+
+@functools.lru_cache(maxsize=1)
+def _image_dir():
+    """
+    Lowercased names of the files in elevation-images, listed once per process
+    instead of stat'ing two files per row. Call _image_dir.cache_clear() to
+    pick up changes on disk.
+    """
+    try:
+        with os.scandir("elevation-images") as it:
+            return frozenset(e.name.lower() for e in it if e.is_file())
+    except FileNotFoundError:
+        return frozenset()
+
+def _dump_one(item, safe=False):
     """
-    console_ports = []
-    for c in ['con0', 'con1', 'con2']:
-        ctype = row.get(c, '').strip()
-        if ctype:
-            console_ports.append({
-                'name': c,
-                'type': ctype
-            })
-    return console_ports
-
-def main(csv_filename='models.csv'):
-    with open(csv_filename, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    Serialize one (out_filename, device_dict) pair to YAML and write it out.
+    Returns out_filename.
+    """
+    out_filename, device_dict = item
+
+    # Dump to YAML
+    if safe:
+        yaml_string = yaml.dump(device_dict, sort_keys=False, Dumper=IndentDumper, allow_unicode=True)
+    else:
+        yaml_string = emit_device_yaml(device_dict)
+
+    with open(out_filename, 'w', encoding='utf-8', buffering=65536) as out_f:
+        out_f.write("---\n" + yaml_string)
+    return out_filename
+
+def main(csv_filename='models.csv', safe=False, jobs=8):
+    """
+    Generate one devicetype-library YAML file per row of csv_filename.
+    With safe=True the files are written through yaml.dump instead of the
+    hand-written emitter, for verifying the emitter's output.
+    Each file is written as soon as its row is parsed, from `jobs` threads;
+    jobs=1 writes them one by one on the calling thread.
+    """
+    image_set = _image_dir()
+
+    generated = []
+    futures = []
+    # With jobs > 1 the writes overlap on a thread pool; leaving the block waits for them
+    writer_pool = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else contextlib.nullcontext()
+    with open(csv_filename, newline='', encoding='utf-8') as f, writer_pool as ex:
+        # Plain rows plus a header name -> column index map; avoids a dict per row
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        idx = {name: i for i, name in enumerate(header)}
         for row in reader:
-            model = row['Model']
+            # DictReader skipped blank lines for us; csv.reader yields them as []
+            if not row:
+                continue
+            model = row[idx['Model']]
             part_number = model
             # Build the slug from the model name
             device_slug = f"cisco-{slugify(model)}"
@@ -201,10 +316,10 @@ def main(csv_filename='models.csv'):
             # this is the convention used in other cisco catalyst models on device type library for the name only
             model = model.replace("C1300", "Catalyst 1300")
 
-            weight_lbs = float(row['Weight (pounds)'])
+            weight_lbs = float(row[idx['Weight (pounds)']])
 
             # Draw is in watts
-            max_draw = int(round(float(row['Draw'])))
+            max_draw = int(round(float(row[idx['Draw']])))
 
             # Build the device dictionary
             device_dict = {
@@ -219,38 +334,47 @@ def main(csv_filename='models.csv'):
                 'comments': '[Catalyst 1300 Datasheet](https://www.cisco.com/c/en/us/products/collateral/switches/catalyst-1300-series-switches/nb-06-cat1300-ser-data-sheet-cte-en.html)',
                 'weight': weight_lbs,
                 'weight_unit': 'lb',
-                'interfaces': create_interfaces(row),
-                'console-ports': create_console_ports(row),
+                'interfaces': create_interfaces(row, idx),
+                'console-ports': create_console_ports(row, idx),
                 'power-ports': [
                     {
                         'name': 'PSU0',
-                        'type': row['psu0'],
+                        'type': row[idx['psu0']],
                         'maximum_draw': max_draw
                     }
                 ],
             }
 
             # Check for front and rear images named using the device slug
-            front_path = os.path.join("elevation-images", f"{device_slug.lower()}.front.png")
-            rear_path  = os.path.join("elevation-images", f"{device_slug.lower()}.rear.png")
-
-            front_exists = os.path.isfile(front_path)
-            rear_exists = os.path.isfile(rear_path)
+            front_exists = f"{device_slug.lower()}.front.png" in image_set
+            rear_exists = f"{device_slug.lower()}.rear.png" in image_set
 
             if front_exists:
                 device_dict['front_image'] = True
             if rear_exists:
                 device_dict['rear_image'] = True
 
-            # Dump to YAML
-            yaml_string = yaml.dump(device_dict, sort_keys=False, Dumper=IndentDumper, allow_unicode=True)
-
             out_filename = "Cisco/" + filename + f".yaml"
-            with open(out_filename, 'w', encoding='utf-8') as out_f:
-                out_f.write("---\n")
-                out_f.write(yaml_string)
 
-            print(f"Generated {out_filename}")
+            # Write each file as soon as its row is parsed, so an error in a
+            # later row still leaves every earlier file written
+            if ex is not None:
+                futures.append(ex.submit(_dump_one, (out_filename, device_dict), safe=safe))
+            else:
+                generated.append(_dump_one((out_filename, device_dict), safe=safe))
+
+    generated.extend(fut.result() for fut in futures)
+
+    # One batched summary instead of a print per row
+    sys.stdout.write("".join(f"Generated {fn}\n" for fn in generated))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate devicetype-library YAML files from a models CSV.")
+    parser.add_argument("csv_filename", nargs="?", default="models.csv",
+                        help="input CSV file (default: models.csv)")
+    parser.add_argument("--safe", action="store_true",
+                        help="serialize with yaml.dump instead of the built-in emitter")
+    parser.add_argument("--jobs", type=int, default=8,
+                        help="number of writer threads; 1 disables threading (default: 8)")
+    args = parser.parse_args()
+    main(args.csv_filename, safe=args.safe, jobs=args.jobs)
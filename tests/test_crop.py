@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import crop
+
+
+def _transparent(size, box, fill=(40, 80, 160, 255)):
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle(box, fill=fill)
+    # A translucent patch so the alpha blend is exercised too
+    draw.ellipse((box[0] + 2, box[1] + 2, box[0] + 30, box[1] + 30), fill=(10, 200, 10, 128))
+    return img
+
+
+def _palette():
+    img = Image.new("P", (300, 40), 0)
+    img.putpalette([0, 0, 0, 200, 30, 30] + [0] * 762)
+    ImageDraw.Draw(img).rectangle((10, 5, 250, 30), fill=1)
+    img.info["transparency"] = 0
+    return img
+
+
+INPUTS = {
+    "transparent": lambda: _transparent((600, 80), (20, 10, 499, 59)),
+    "too-wide": lambda: _transparent((1300, 120), (10, 10, 1209, 109)),
+    "too-narrow": lambda: _transparent((300, 120), (10, 10, 209, 109)),
+    "fully-transparent": lambda: Image.new("RGBA", (50, 50), (0, 0, 0, 0)),
+    "opaque-rgb": lambda: Image.new("RGB", (400, 100), (90, 90, 90)),
+    "opaque-10-to-1": lambda: Image.new("RGB", (980, 100), (90, 90, 90)),
+    "opaque-too-wide": lambda: Image.new("RGB", (1500, 100), (90, 90, 90)),
+    "la": lambda: Image.new("LA", (200, 20), (100, 255)),
+    "palette": _palette,
+}
+
+
+@pytest.mark.parametrize("name", INPUTS)
+def test_fast_and_two_pass_pipelines_agree(tmp_path, name):
+    src = tmp_path / "src.png"
+    INPUTS[name]().save(src)
+
+    slow = tmp_path / "slow.png"
+    fast = tmp_path / "fast.png"
+    assert crop.process_image(str(src), str(slow)) == str(slow)
+    assert crop.process_image_fast(str(src), str(fast)) == str(fast)
+
+    with Image.open(slow) as a, Image.open(fast) as b:
+        assert a.mode == b.mode == "RGB"
+        assert a.size == b.size
+        assert a.width == int(9.8 * a.height)
+        assert np.array_equal(np.asarray(a), np.asarray(b))
+
+
+@pytest.mark.parametrize("process", [crop.process_image, crop.process_image_fast])
+def test_in_place_final_image_is_skipped(tmp_path, process):
+    path = tmp_path / "final.png"
+    Image.new("RGB", (980, 100), (90, 90, 90)).save(path)
+    before = path.read_bytes()
+    assert process(str(path), str(path)) is None
+    assert path.read_bytes() == before
@@ -0,0 +1,78 @@
+import math
+import os
+
+import pytest
+import yaml
+
+import generate
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EDGE_VALUES = [
+    True, False, 0, -3, 8.7, 1.0, 1e-07, 1e16, -2.5e-300,
+    float('inf'), -float('inf'),
+    '', ' ', 'a-b ', 'true', 'no', 'null', '~', '1.0', '123', '0x1f',
+    'a: b', 'x #y', '[x](y)', '- item', "it's", '"quoted"', 'back\\slash',
+    'tab\there', 'new\nline', 'trailing\n', 'x\r\ny', 'café', '☃ snowman', 'bell\x07',
+]
+
+
+@pytest.mark.parametrize('value', EDGE_VALUES, ids=repr)
+def test_emitter_round_trips(value):
+    device = {'value': value, 'items': [{'name': value}]}
+    assert yaml.safe_load(generate.emit_device_yaml(device)) == device
+
+
+def test_emitter_round_trips_nan():
+    loaded = yaml.safe_load(generate.emit_device_yaml({'value': float('nan')}))
+    assert math.isnan(loaded['value'])
+
+
+def _generate(tmp_path, monkeypatch, safe):
+    out_dir = tmp_path / ('safe' if safe else 'fast')
+    (out_dir / 'Cisco').mkdir(parents=True)
+    monkeypatch.chdir(out_dir)
+    generate.main(os.path.join(REPO_ROOT, 'models.csv'), safe=safe)
+    return {p.name: p.read_bytes() for p in (out_dir / 'Cisco').iterdir()}
+
+
+def test_emitter_matches_yaml_dump_for_models_csv(tmp_path, monkeypatch):
+    fast = _generate(tmp_path, monkeypatch, safe=False)
+    safe = _generate(tmp_path, monkeypatch, safe=True)
+    assert fast
+    assert fast == safe
+
+
+def test_main_skips_blank_lines(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'models.csv'
+    with open(os.path.join(REPO_ROOT, 'models.csv'), encoding='utf-8') as f:
+        csv_path.write_text(f.read() + '\n\n', encoding='utf-8')
+    (tmp_path / 'Cisco').mkdir()
+    monkeypatch.chdir(tmp_path)
+    generate.main(str(csv_path))
+    assert len(list((tmp_path / 'Cisco').iterdir())) == 28
+
+
+@pytest.mark.parametrize('content', ['', 'Model,Weight (pounds),Draw\n'], ids=['empty', 'header-only'])
+def test_main_handles_csv_without_rows(tmp_path, monkeypatch, content):
+    csv_path = tmp_path / 'models.csv'
+    csv_path.write_text(content, encoding='utf-8')
+    (tmp_path / 'Cisco').mkdir()
+    monkeypatch.chdir(tmp_path)
+    generate.main(str(csv_path))
+    assert not list((tmp_path / 'Cisco').iterdir())
+
+
+@pytest.mark.parametrize('jobs', [1, 8])
+def test_main_writes_rows_before_a_bad_row(tmp_path, monkeypatch, jobs):
+    with open(os.path.join(REPO_ROOT, 'models.csv'), encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    bad = lines[-1].split(',')
+    bad[1] = 'not-a-number'
+    csv_path = tmp_path / 'models.csv'
+    csv_path.write_text('\n'.join(lines[:-1] + [','.join(bad)]) + '\n', encoding='utf-8')
+    (tmp_path / 'Cisco').mkdir()
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError):
+        generate.main(str(csv_path), jobs=jobs)
+    assert len(list((tmp_path / 'Cisco').iterdir())) == len(lines) - 2